@@ -47,6 +47,12 @@ def pytest_addoption(parser):
         default=False,
         help="Run Corstone-300 FVP tests",
     )
+    parser.addoption(
+        "--cmsisnn-fast",
+        action="store_true",
+        default=False,
+        help="Run CMSIS-NN tests on a reduced set of smaller shapes",
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -0,0 +1,59 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Pytest configuration for the CMSIS-NN integration tests.
+
+The tests do not share any state across files, so they can be distributed over
+multiple processes with pytest-xdist. Grouping by file keeps the per-module
+caches in e.g. test_conv2d.py effective on each worker:
+
+    pytest -n $(nproc) --dist=loadfile tests/python/contrib/test_cmsisnn/test_conv2d.py
+
+Passing --cmsisnn-fast swaps the largest input shapes for smaller ones, which
+reduces the cost of generating reference outputs, and deselects the redundant
+test cases marked with cmsisnn_full.
+"""
+import pytest
+
+
+def pytest_configure(config):
+    """Registers the marker for the cases left out of the --cmsisnn-fast run"""
+    config.addinivalue_line(
+        "markers", "cmsisnn_full: mark a test case as only run without --cmsisnn-fast"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselects the cmsisnn_full cases when --cmsisnn-fast is passed"""
+    if not config.getoption("--cmsisnn-fast"):
+        return
+
+    selected, deselected = [], []
+    for item in items:
+        if "cmsisnn_full" in item.keywords:
+            deselected.append(item)
+        else:
+            selected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+@pytest.fixture(scope="session")
+def cmsisnn_fast(request):
+    """Whether the reduced --cmsisnn-fast test matrix was requested"""
+    return request.config.getoption("--cmsisnn-fast")
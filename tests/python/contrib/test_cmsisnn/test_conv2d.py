@@ -16,7 +16,8 @@
 # under the License.
 
 """CMSIS-NN integration tests: Conv2D"""
-import itertools
+import functools
+import sys
 import numpy as np
 import pytest
 import tvm
@@ -42,6 +43,27 @@ from utils import (
 )
 
 
+@functools.lru_cache(maxsize=None)
+def _get_weight_and_bias(weight_shape, kernel_dtype):
+    """Returns the constant weight and bias for the given HWIO weight shape.
+
+    Both are drawn from the same fixed seed, so the arrays are generated once per
+    weight shape and kernel dtype and shared between models.
+    """
+    rng = np.random.default_rng(12321)
+    w = tvm.nd.array(
+        rng.integers(
+            np.iinfo(kernel_dtype).min,
+            high=np.iinfo(kernel_dtype).max,
+            size=weight_shape,
+            dtype=kernel_dtype,
+        )
+    )
+    out_channels = weight_shape[3]
+    b = tvm.nd.array(rng.integers(0, high=10, size=(out_channels,), dtype="int32"))
+    return w, b
+
+
 def make_model(
     shape,
     kernel_shape,
@@ -80,15 +102,7 @@ def make_model(
         shape = (shape[0], shape[1] + p[0] + p[2], shape[2] + p[1] + p[3], shape[3])
 
     weight_shape = (kernel_h, kernel_w, shape[3] // groups, out_channels)
-    rng = np.random.default_rng(12321)
-    w = tvm.nd.array(
-        rng.integers(
-            np.iinfo(kernel_dtype).min,
-            high=np.iinfo(kernel_dtype).max,
-            size=weight_shape,
-            dtype=kernel_dtype,
-        )
-    )
+    w, b = _get_weight_and_bias(weight_shape, kernel_dtype)
     weight_const = relay.const(w, kernel_dtype)
     conv = relay.qnn.op.conv2d(
         a,
@@ -107,7 +121,6 @@ def make_model(
         padding=p,
         out_dtype="int32",
     )
-    b = tvm.nd.array(rng.integers(0, high=10, size=(out_channels,), dtype="int32"))
     bias_const = relay.const(b, "int32")
     last_op = relay.nn.bias_add(conv, bias_const, axis=3) if enable_bias else conv
     requant_input_sc = [sc * input_scale for sc in kernel_scale]
@@ -124,18 +137,8 @@ def make_model(
     return last_op, params
 
 
-@tvm.testing.requires_cmsisnn
-@pytest.mark.parametrize("ifm_shape", [(1, 28, 28, 12), (1, 64, 100, 4)])
-@pytest.mark.parametrize("kernel_size", [(3, 3)])
-@pytest.mark.parametrize("padding", ["SAME", "VALID"])
-@pytest.mark.parametrize("strides, dilation", [((2, 2), (1, 1)), ((1, 1), (1, 1))])
-@pytest.mark.parametrize("enable_bias", [True, False])
-@pytest.mark.parametrize("relu_type", ["NONE", "RELU"])
-@pytest.mark.parametrize(
-    "input_zero_point, input_scale, kernel_scale, out_channels",
-    [(10, 0.0128, [0.11, 0.22], 2), (-64, 1, [1, 0.0256, 1.37], 3)],
-)
-def test_op_int8(
+@functools.lru_cache(maxsize=None)
+def _build_cached(
     ifm_shape,
     kernel_size,
     padding,
@@ -148,17 +151,17 @@ def test_op_int8(
     kernel_scale,
     out_channels,
 ):
-    interface_api = "c"
-    use_unpacked_api = True
-    test_runner = AOT_CORSTONE300_RUNNER
+    """Returns the original and partitioned modules along with their parameters.
 
+    All arguments must be hashable, so kernel_scale is expected as a tuple. The
+    cache is unbounded as it is cleared by clear_caches once the module is done.
+    """
     kernel_zero_point = 0
     groups = 1
     weight_format = "HWIO"
     kernel_h = kernel_size[0]
     kernel_w = kernel_size[1]
     dtype = "int8"
-    in_min, in_max = get_range_for_dtype_str(dtype)
 
     weight_shape = None
     if weight_format == "HWIO":
@@ -166,6 +169,7 @@ def test_op_int8(
     else:
         weight_shape = (kernel_h, kernel_w, ifm_shape[3], out_channels)
 
+    kernel_scale = list(kernel_scale)
     output_scale, output_zero_point = get_conv2d_qnn_params(
         weight_shape,
         input_scale,
@@ -200,6 +204,94 @@ def test_op_int8(
     )
     orig_mod = make_module(model)
     cmsisnn_mod = cmsisnn.partition_for_cmsisnn(orig_mod, params)
+    return orig_mod, cmsisnn_mod, params
+
+
+@pytest.fixture(scope="module", autouse=True)
+def clear_caches(request):
+    """Drops the weights and modules cached for this file once its tests are done"""
+    request.addfinalizer(_get_weight_and_bias.cache_clear)
+    request.addfinalizer(_build_cached.cache_clear)
+
+
+# Quantization parameters for the int8 tests
+_QNN_PARAMS = [(10, 0.0128, [0.11, 0.22], 2), (-64, 1, [1, 0.0256, 1.37], 3)]
+
+# Smaller shapes substituted for the larger input shapes with --cmsisnn-fast
+_FAST_IFM_SHAPES = {(1, 64, 100, 4): (1, 16, 25, 4)}
+
+
+def _get_build_key(
+    ifm_shape,
+    kernel_size,
+    padding,
+    strides,
+    dilation,
+    enable_bias,
+    relu_type,
+    input_zero_point,
+    input_scale,
+    kernel_scale,
+    out_channels,
+):
+    """Returns the hashable arguments for _build_cached"""
+    return (
+        ifm_shape,
+        kernel_size,
+        padding,
+        strides,
+        dilation,
+        enable_bias,
+        relu_type,
+        input_zero_point,
+        input_scale,
+        tuple(kernel_scale),
+        out_channels,
+    )
+
+
+@tvm.testing.requires_cmsisnn
+@pytest.mark.parametrize("ifm_shape", [(1, 28, 28, 12), (1, 64, 100, 4)])
+@pytest.mark.parametrize("kernel_size", [(3, 3)])
+@pytest.mark.parametrize("padding", ["SAME", "VALID"])
+@pytest.mark.parametrize("strides, dilation", [((2, 2), (1, 1)), ((1, 1), (1, 1))])
+@pytest.mark.parametrize("enable_bias", [True, False])
+@pytest.mark.parametrize("relu_type", ["NONE", "RELU"])
+@pytest.mark.parametrize(
+    "input_zero_point, input_scale, kernel_scale, out_channels",
+    [_QNN_PARAMS[0], pytest.param(*_QNN_PARAMS[1], marks=pytest.mark.cmsisnn_full)],
+)
+def test_op_int8_partition(
+    ifm_shape,
+    kernel_size,
+    padding,
+    strides,
+    dilation,
+    enable_bias,
+    relu_type,
+    input_zero_point,
+    input_scale,
+    kernel_scale,
+    out_channels,
+    cmsisnn_fast,
+):
+    if cmsisnn_fast:
+        ifm_shape = _FAST_IFM_SHAPES.get(ifm_shape, ifm_shape)
+
+    build_key = _get_build_key(
+        ifm_shape,
+        kernel_size,
+        padding,
+        strides,
+        dilation,
+        enable_bias,
+        relu_type,
+        input_zero_point,
+        input_scale,
+        kernel_scale,
+        out_channels,
+    )
+    orig_mod, cmsisnn_mod, _ = _build_cached(*build_key)
 
     # validate pattern matching
     attrs = [
@@ -218,6 +310,53 @@ def test_op_int8(
         cmsisnn_mod
     ), "Number of calls changed during partitioning"
 
+
+@skip_if_no_reference_system
+@tvm.testing.requires_cmsisnn
+@pytest.mark.parametrize(
+    "ifm_shape, padding, enable_bias, relu_type, strides, qnn_params",
+    [
+        ((1, 28, 28, 12), "SAME", True, "RELU", (1, 1), _QNN_PARAMS[0]),
+        ((1, 64, 100, 4), "SAME", False, "NONE", (2, 2), _QNN_PARAMS[1]),
+        ((1, 28, 28, 12), "VALID", True, "RELU", (2, 2), _QNN_PARAMS[1]),
+        ((1, 64, 100, 4), "VALID", False, "NONE", (1, 1), _QNN_PARAMS[0]),
+    ],
+)
+def test_op_int8_numerics(
+    ifm_shape,
+    padding,
+    enable_bias,
+    relu_type,
+    strides,
+    qnn_params,
+    cmsisnn_fast,
+):
+    if cmsisnn_fast:
+        ifm_shape = _FAST_IFM_SHAPES.get(ifm_shape, ifm_shape)
+
+    interface_api = "c"
+    use_unpacked_api = True
+    test_runner = AOT_CORSTONE300_RUNNER
+
+    dtype = "int8"
+    in_min, in_max = get_range_for_dtype_str(dtype)
+
+    input_zero_point, input_scale, kernel_scale, out_channels = qnn_params
+    build_key = _get_build_key(
+        ifm_shape,
+        (3, 3),
+        padding,
+        strides,
+        (1, 1),
+        enable_bias,
+        relu_type,
+        input_zero_point,
+        input_scale,
+        kernel_scale,
+        out_channels,
+    )
+    orig_mod, cmsisnn_mod, params = _build_cached(*build_key)
+
     # validate the output
     rng = np.random.default_rng(12345)
     inputs = {"input": rng.integers(in_min, high=in_max, size=ifm_shape, dtype=dtype)}
@@ -236,25 +375,18 @@ def test_op_int8(
     )
 
 
-def parameterize_for_invalid_model(test):
-    in_dtype = ["uint8", "int8"]
-    kernel_dtype = ["uint8", "int8"]
-    kernel_zero_point = [-33, 10, 0]
-    all_combinations = itertools.product(in_dtype, kernel_dtype, kernel_zero_point)
-    all_combinations = filter(
-        lambda parameters: not (
-            parameters[0] == "int8" and parameters[1] == "int8" and parameters[2] == 0
-        ),
-        all_combinations,
-    )
-    return pytest.mark.parametrize(
-        ["in_dtype", "kernel_dtype", "kernel_zero_point"],
-        all_combinations,
-    )(test)
+# Data types and kernel zero points not supported by CMSIS-NN
+_INVALID_COMBINATIONS = tuple(
+    (in_dtype, kernel_dtype, kernel_zero_point)
+    for in_dtype in ("uint8", "int8")
+    for kernel_dtype in ("uint8", "int8")
+    for kernel_zero_point in (-33, 10, 0)
+    if not (in_dtype == "int8" and kernel_dtype == "int8" and kernel_zero_point == 0)
+)
 
 
 @tvm.testing.requires_cmsisnn
-@parameterize_for_invalid_model
+@pytest.mark.parametrize(["in_dtype", "kernel_dtype", "kernel_zero_point"], _INVALID_COMBINATIONS)
 def test_invalid_parameters(
     in_dtype,
     kernel_dtype,